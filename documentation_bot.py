@@ -5,167 +5,508 @@ for code repositories using OpenAI's language models.
 """
 
 import os
+import re
 import sys
-import argparse
+import json
+import mmap
+import hashlib
+import functools
+import tempfile
+import time
 import logging
+import importlib.util
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 
-# Try to import optional dependencies
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    def load_dotenv():
-        pass
+# Optional dependencies are imported on first use: openai is slow to import
+# and only needed once documentation is actually generated
+openai_available = importlib.util.find_spec('openai') is not None
+OpenAI: Optional[Any] = None
+
+
+def _import_openai():
+    """Import the OpenAI client class on first use and return it."""
+    global OpenAI
+    if OpenAI is None:
+        from openai import OpenAI as client_class
+        OpenAI = client_class
+    return OpenAI
 
-try:
-    from openai import OpenAI
-    openai_available = True
-except ImportError:
-    openai_available = False
+
+def _load_dotenv() -> None:
+    """Load environment variables from a .env file if python-dotenv is installed."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Directories that are never descended into during repository analysis
+IGNORE_DIRS = frozenset({'.git', '__pycache__', '.pytest_cache', 'node_modules', '.venv', 'venv'})
+
+# Files larger than this (in bytes) are skipped during analysis
+_MAX_SIZE = 1 << 20  # 1MB
+
+# Upper bound on threads used to stat and probe files in parallel
+_MAX_PROBE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Suffixes that are always treated as text, skipping the binary-content probe
+_TEXT_SUFFIXES = frozenset({
+    '.py', '.js', '.ts', '.tsx', '.jsx', '.html', '.css', '.json', '.md',
+    '.yml', '.yaml', '.txt', '.toml', '.ini', '.cfg', '.rst'
+})
+
+# Well-known entry point and configuration file names (lower-cased)
+_MAIN_FILES = frozenset({'main.py', 'app.py', 'index.py', 'run.py'})
+_CONFIG_FILES = frozenset({
+    'requirements.txt', 'package.json', 'setup.py', 'pyproject.toml',
+    'dockerfile', 'docker-compose.yml', '.env.example', 'config.json'
+})
+
+# Maps a file suffix to (language, project type it implies or None)
+_SUFFIX_TO_LANG = {
+    '.py': ('Python', 'Python'),
+    '.js': ('JavaScript', 'JavaScript'),
+    '.jsx': ('JavaScript', 'JavaScript'),
+    '.ts': ('JavaScript', 'JavaScript'),
+    '.tsx': ('JavaScript', 'JavaScript'),
+    '.html': ('HTML', None),
+    '.htm': ('HTML', None),
+    '.css': ('CSS', None),
+    '.json': ('JSON', None),
+    '.md': ('Markdown', None),
+    '.yml': ('YAML', None),
+    '.yaml': ('YAML', None),
+    '.txt': ('Text', None),
+}
+
+# Pinned requirements (``name==version``, optionally with extras and spaces
+# around ``==``) at the start of a line in requirements.txt, after a UTF-8 BOM
+# on the first line; commented-out lines never match
+_REQ_RE = re.compile(
+    rb'(?m)^(?:\xef\xbb\xbf)?[ \t]*([A-Za-z0-9_.\-]+(?:\[[^\]\r\n]*\])?)[ \t]*==[ \t]*([^\s#;]+)'
+)
+
+# Requirements files smaller than this are read directly instead of mmap'ed
+_MMAP_MIN_SIZE = 4096
+
+# A regular file found by RepositoryAnalyzer._walk, with its relative path
+_WalkEntry = Tuple["os.DirEntry[str]", str]
+
+# Result of probing one file: (relative_path, filename, suffix, ignored)
+_ProbeResult = Tuple[str, str, str, bool]
+
+# Bump when the shape or rules of the analysis result change, so stale
+# cache entries are not reused
+_ANALYSIS_CACHE_VERSION = 3
+
+
+# Sampling parameters for every LLM call; also part of the response cache key
+_LLM_TEMPERATURE = 0.3
+_LLM_MAX_TOKENS = 4000
+
+# Batch API jobs in one of these states will not progress any further
+_BATCH_TERMINAL_STATES = frozenset({'completed', 'failed', 'expired', 'cancelled'})
+
+# Maximum number of repository paths listed in a prompt, to bound its size
+_STRUCTURE_LIMIT = 500
+
+
+def _default_cache_dir() -> Path:
+    """Return the per-user cache directory for the documentation bot."""
+    base = os.getenv('XDG_CACHE_HOME') or (Path.home() / '.cache')
+    return Path(base) / 'documentation_bot'
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    """Write ``text`` to ``path`` via a temporary file and ``os.replace``.
+    
+    Readers never see a partially written file, and concurrent writers of
+    the same path simply replace each other's complete output.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
 
 class RepositoryAnalyzer:
     """Analyzes a code repository to understand its structure and content."""
     
-    def __init__(self, repo_path: Path):
-        """Initialize the analyzer with the repository path."""
-        self.repo_path = Path(repo_path)
+    def __init__(self, repo_path: Path, cache_dir: Optional[Path] = None):
+        """Initialize the analyzer with the repository path.
+        
+        Analysis results are cached in ``cache_dir`` (by default the user's
+        cache directory) and reused while the repository is unchanged. Each
+        repository has a single cache entry. Set ``DOCBOT_ANALYSIS_CACHE=0``
+        to disable the cache.
+        """
+        self.rebind(repo_path)
         if not self.repo_path.exists():
             raise ValueError(f"Repository path does not exist: {repo_path}")
+        self.cache_dir: Optional[Path] = None
+        if os.getenv('DOCBOT_ANALYSIS_CACHE') != '0':
+            self.cache_dir = Path(cache_dir) if cache_dir is not None else _default_cache_dir()
+    
+    def rebind(self, repo_path: Path) -> None:
+        """Point the analyzer at another repository, keeping its cache settings.
+        
+        Unlike the constructor, the new path is not checked for existence.
+        """
+        self.repo_path = Path(repo_path)
+        # Relative paths are sliced off full paths rather than using relative_to
+        self._repo_root = str(self.repo_path)
+        self._repo_prefix_len = len(os.path.join(self._repo_root, ''))
     
     def analyze(self) -> Dict[str, Any]:
         """Analyze the repository and return structured information."""
-        logger.info(f"Analyzing repository: {self.repo_path}")
+        logger.info("Analyzing repository: %s", self.repo_path)
         
-        result = {
+        result: Dict[str, Any] = {
             'file_types': set(),
             'languages': set(),
             'structure': [],
             'main_files': [],
             'config_files': [],
             'dependencies': [],
-            'project_type': 'unknown'
+            'project_type': 'unknown',
+            # Set once the first language implying a project type is seen
+            '_pt_locked': False
         }
         
-        # Walk through all files in the repository
-        for file_path in self.repo_path.rglob('*'):
-            if file_path.is_file() and not self._should_ignore_file(file_path):
-                relative_path = file_path.relative_to(self.repo_path)
-                result['structure'].append(str(relative_path))
-                
-                # Analyze file extension
-                suffix = file_path.suffix.lower()
-                if suffix:
-                    result['file_types'].add(suffix)
-                
-                # Determine language and project type
-                self._analyze_file(file_path, result)
+        # Walk the repository first and reuse a cached analysis if nothing changed
+        entries = list(self._walk())
+        fingerprint = self._fingerprint(entries)
+        cache_file = self._analysis_cache_file()
+        cached = self._load_cached_analysis(cache_file, fingerprint)
+        if cached is not None:
+            logger.info("Using cached analysis. Found %d files.", len(cached['structure']))
+            return cached
+        
+        # Stat and probe the files in parallel; the probes are syscall-bound
+        # and release the GIL
+        workers = min(_MAX_PROBE_WORKERS, len(entries))
+        probes: Iterable[_ProbeResult]
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                probes = list(executor.map(self._probe, entries))
+        else:
+            probes = map(self._probe, entries)
+        
+        # Aggregate results on this thread, in walk order. The loop body is
+        # tiny, so the per-file method lookups are bound to locals up front.
+        structure_append = result['structure'].append
+        file_types_add = result['file_types'].add
+        analyze_file = self._analyze_file
+        for relative_path, filename, suffix, ignored in probes:
+            if ignored:
+                continue
+            structure_append(relative_path)
+            
+            # Analyze file extension
+            if suffix:
+                file_types_add(suffix)
+            
+            # Determine language and project type
+            analyze_file(filename, suffix, relative_path, result)
+        
+        del result['_pt_locked']
         
         # Convert sets to lists for JSON serialization
         result['file_types'] = list(result['file_types'])
         result['languages'] = list(result['languages'])
         
-        logger.info(f"Analysis complete. Found {len(result['structure'])} files.")
+        self._store_cached_analysis(cache_file, fingerprint, result)
+        
+        logger.info("Analysis complete. Found %d files.", len(result['structure']))
         return result
     
-    def _should_ignore_file(self, file_path: Path) -> bool:
-        """Determine if a file should be ignored during analysis."""
-        # Ignore common directories
-        ignore_dirs = {'.git', '__pycache__', '.pytest_cache', 'node_modules', '.venv', 'venv'}
-        if any(part in ignore_dirs for part in file_path.parts):
-            return True
+    def _fingerprint(self, entries: List[_WalkEntry]) -> str:
+        """Return a fingerprint of the repository's current file listing.
+        
+        Covers every relative path, the file count, total size and newest
+        modification time. The stat results are cached on the entries, so the
+        later probes do not stat again.
+        """
+        digest = hashlib.sha256(f"{_ANALYSIS_CACHE_VERSION}\0".encode())
+        count = total_size = newest_mtime = 0
+        for entry, relative_path in entries:
+            try:
+                st = self._stat(entry)
+            except OSError:
+                continue
+            count += 1
+            total_size += st.st_size
+            newest_mtime = max(newest_mtime, st.st_mtime_ns)
+            digest.update(relative_path.encode('utf-8', 'surrogateescape'))
+            digest.update(b'\0')
+        digest.update(f"{count}:{total_size}:{newest_mtime}".encode())
+        return digest.hexdigest()
+    
+    def _analysis_cache_file(self) -> Optional[Path]:
+        """Return the repository's cache entry, or None if caching is disabled.
         
+        The name depends only on the repository location, so a changed
+        repository overwrites its entry instead of adding another.
+        """
+        if self.cache_dir is None:
+            return None
+        key = hashlib.sha256(str(self.repo_path.resolve()).encode('utf-8', 'surrogateescape')).hexdigest()
+        return self.cache_dir / f"repo_analysis_{key}.json"
+    
+    def _load_cached_analysis(self, cache_file: Optional[Path], fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the analysis cached in ``cache_file`` if it matches ``fingerprint``."""
+        if cache_file is None:
+            return None
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cached, dict) or cached.get('fingerprint') != fingerprint:
+            return None
+        return cached.get('analysis')
+    
+    def _store_cached_analysis(self, cache_file: Optional[Path], fingerprint: str, result: Dict[str, Any]) -> None:
+        """Atomically replace ``cache_file`` with ``result``; failures are not fatal."""
+        if cache_file is None:
+            return
+        try:
+            _atomic_write_text(cache_file, json.dumps({'fingerprint': fingerprint, 'analysis': result}))
+        except OSError as e:
+            logger.debug("Could not write analysis cache %s: %s", cache_file, e)
+    
+    def _walk(self) -> Iterator[_WalkEntry]:
+        """Yield ``(entry, relative_path)`` for every regular file in the repository.
+        
+        Uses ``os.scandir`` so file type and ``stat`` information come from
+        the directory entry, and ignored directories are never descended into.
+        Relative paths always use ``/`` as the separator, so the structure
+        listing is the same on every platform.
+        """
+        prefix_len = self._repo_prefix_len
+        normalize = os.sep != '/'
+        stack = [self._repo_root]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in IGNORE_DIRS:
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            relative_path = entry.path[prefix_len:]
+                            if normalize:
+                                relative_path = relative_path.replace(os.sep, '/')
+                            yield entry, relative_path
+            except OSError:
+                continue
+    
+    @staticmethod
+    def _stat(entry: "os.DirEntry[str]") -> os.stat_result:
+        """Return the stat result for a walked entry, without following symlinks.
+        
+        ``DirEntry`` caches the result, so repeated calls do not hit the
+        filesystem again.
+        """
+        return entry.stat(follow_symlinks=False)
+    
+    def _probe(self, item: _WalkEntry) -> _ProbeResult:
+        """Classify one ``(entry, relative_path)`` pair from ``_walk``.
+        
+        Returns ``(relative_path, filename, suffix, ignored)``. Safe to run
+        from worker threads as it does not touch shared state.
+        """
+        entry, relative_path = item
+        filename = entry.name.lower()
+        stem, _, ext = filename.rpartition('.')
+        suffix = '.' + ext if stem and ext else ''
+        
+        try:
+            st = self._stat(entry)
+        except OSError:
+            return relative_path, filename, suffix, True
+        return relative_path, filename, suffix, self._should_ignore_entry(entry, st, suffix)
+    
+    def _should_ignore_entry(self, entry: "os.DirEntry[str]", st: os.stat_result, suffix: str) -> bool:
+        """Determine if a file should be ignored during analysis.
+        
+        ``st`` is the entry's cached stat result, so no further ``stat`` call
+        is made. Ignored directories are pruned by ``_walk``, so only the file
+        itself is checked here. Files with a known text ``suffix`` are never
+        opened.
+        """
         # Ignore binary files and large files
-        if file_path.stat().st_size > 1024 * 1024:  # 1MB limit
+        if st.st_size > _MAX_SIZE:
             return True
         
+        if suffix in _TEXT_SUFFIXES:
+            return False
+        
         # Check if file is binary by looking for null bytes
         try:
-            with open(file_path, 'rb') as f:
-                chunk = f.read(1024)
-                if b'\x00' in chunk:
-                    return True
-        except:
+            fd = os.open(entry.path, os.O_RDONLY)
+            try:
+                chunk = os.read(fd, 1024)
+            finally:
+                os.close(fd)
+            if b'\x00' in chunk:
+                return True
+        except OSError:
             return True
         
         return False
     
-    def _analyze_file(self, file_path: Path, result: Dict[str, Any]):
-        """Analyze a specific file and update the result dictionary."""
-        filename = file_path.name.lower()
-        suffix = file_path.suffix.lower()
+    def _analyze_file(self, filename: str, suffix: str, relative_path: str, result: Dict[str, Any]) -> None:
+        """Analyze a specific file and update the result dictionary.
         
+        ``filename`` and ``suffix`` are expected to be lower-cased already.
+        """
         # Detect main files
-        if filename in {'main.py', 'app.py', 'index.py', 'run.py'}:
-            result['main_files'].append(str(file_path.relative_to(self.repo_path)))
+        if filename in _MAIN_FILES:
+            result['main_files'].append(relative_path)
         
         # Detect config files
-        if filename in {'requirements.txt', 'package.json', 'setup.py', 'pyproject.toml', 
-                       'dockerfile', 'docker-compose.yml', '.env.example', 'config.json'}:
-            result['config_files'].append(str(file_path.relative_to(self.repo_path)))
+        if filename in _CONFIG_FILES:
+            result['config_files'].append(relative_path)
         
         # Detect languages and project types
-        if suffix == '.py':
-            result['languages'].add('Python')
-            if not result['project_type'] or result['project_type'] == 'unknown':
-                result['project_type'] = 'Python'
-        elif suffix in {'.js', '.jsx', '.ts', '.tsx'}:
-            result['languages'].add('JavaScript')
-            if not result['project_type'] or result['project_type'] == 'unknown':
-                result['project_type'] = 'JavaScript'
-        elif suffix in {'.html', '.htm'}:
-            result['languages'].add('HTML')
-        elif suffix == '.css':
-            result['languages'].add('CSS')
-        elif suffix == '.json':
-            result['languages'].add('JSON')
-        elif suffix == '.md':
-            result['languages'].add('Markdown')
-        elif suffix in {'.yml', '.yaml'}:
-            result['languages'].add('YAML')
-        elif suffix == '.txt':
-            result['languages'].add('Text')
+        entry_lang = _SUFFIX_TO_LANG.get(suffix)
+        if entry_lang:
+            lang, project_type = entry_lang
+            result['languages'].add(lang)
+            if project_type and not result['_pt_locked']:
+                result['project_type'] = project_type
+                result['_pt_locked'] = True
         
         # Extract dependencies from requirements.txt
         if filename == 'requirements.txt':
             try:
-                content = file_path.read_text()
-                for line in content.split('\n'):
-                    line = line.strip()
-                    if line and not line.startswith('#') and '==' in line:
-                        result['dependencies'].append(line)
-            except:
+                result['dependencies'].extend(
+                    self._extract_requirements(os.path.join(self.repo_path, relative_path))
+                )
+            except (OSError, ValueError):
                 pass
+    
+    def _extract_requirements(self, path: str) -> List[str]:
+        """Return the pinned requirements listed in a requirements file.
+        
+        The file is scanned as raw bytes without decoding, which is safe as
+        pip's requirement syntax is ASCII. Larger files are memory-mapped so
+        pages are loaded on demand without copying into a Python buffer.
+        """
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            if size < _MMAP_MIN_SIZE:
+                return self._pinned_requirements(os.read(fd, _MMAP_MIN_SIZE))
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                return self._pinned_requirements(mapped)
+        finally:
+            os.close(fd)
+    
+    @staticmethod
+    def _pinned_requirements(data) -> List[str]:
+        """Return the ``_REQ_RE`` matches in ``data`` normalized to ``name==version``."""
+        return [
+            (name + b'==' + version).decode('ascii', 'replace')
+            for name, version in _REQ_RE.findall(data)
+        ]
+
+
+@functools.lru_cache(maxsize=4)
+def _readme_system_prompt(detail_level: str) -> str:
+    """Build the README system prompt, which depends only on the detail level."""
+    detail_instructions = {
+        'low': "Provide a basic overview with minimal technical details.",
+        'medium': "Include setup instructions, basic usage, and key features.",
+        'high': "Include detailed setup instructions, code examples, architecture overview, and comprehensive feature documentation."
+    }
+    
+    return f"""You are an expert technical writer creating README.md files for software projects.
+
+Detail Level: {detail_level}
+Instructions: {detail_instructions.get(detail_level, detail_instructions['medium'])}
+
+Create a well-structured README.md that includes:
+1. Project title and description
+2. Features and capabilities
+3. Installation and setup instructions
+4. Usage examples
+5. Project structure overview
+6. Contributing guidelines (if applicable)
+7. License information (if available)
+
+Use proper Markdown formatting and make it professional and informative."""
 
 
 class DocumentationGenerator:
     """Generates documentation using OpenAI's language models."""
     
-    def __init__(self, repo_path: Path, detail_level: str, max_llm_calls: int):
-        """Initialize the documentation generator."""
+    def __init__(self, repo_path: Path, detail_level: str, max_llm_calls: int, fuse_docs: bool = False):
+        """Initialize the documentation generator.
+        
+        With ``fuse_docs`` the docs/ files are requested in a single LLM call,
+        falling back to one call per file if the reply cannot be parsed.
+        """
         self.repo_path = Path(repo_path)
         self.detail_level = detail_level
         self.max_llm_calls = max_llm_calls
+        self.fuse_docs = fuse_docs
         self.llm_calls_made = 0
+        # Guards llm_calls_made when documents are generated concurrently
+        self._llm_calls_lock = threading.Lock()
         
         # Check if OpenAI is available
         if not openai_available:
             raise ImportError("OpenAI library is not installed. Please install it with: pip install openai")
         
         # Validate OpenAI API key
+        _load_dotenv()
         api_key = os.getenv('OPENAI_API_KEY')
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
-        # Initialize OpenAI client
-        self.client = OpenAI(api_key=api_key)
+        # Initialize OpenAI client once so its connection pool is reused by
+        # every call
+        self.client = _import_openai()(api_key=api_key, http_client=self._make_http_client())
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4')
+        
+        # Opt-in on-disk cache of LLM responses, enabled with DOCBOT_CACHE=1
+        self.llm_cache_dir = _default_cache_dir() / 'llm' if os.getenv('DOCBOT_CACHE') == '1' else None
+    
+    @staticmethod
+    def _make_http_client():
+        """Create the pooled HTTP client used for OpenAI API calls.
+        
+        Keep-alive connections are shared by the concurrent docs/ requests,
+        and HTTP/2 is enabled when the optional h2 package is installed.
+        Returns None, leaving the SDK to create its own client, if httpx is
+        not importable.
+        """
+        try:
+            import httpx
+        except ImportError:
+            return None
+        import openai
+        
+        # DefaultHttpxClient keeps the SDK's timeout and redirect defaults
+        client_class = getattr(openai, 'DefaultHttpxClient', httpx.Client)
+        return client_class(
+            http2=importlib.util.find_spec('h2') is not None,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+        )
     
     def generate_readme(self, analysis: Dict[str, Any]) -> None:
         """Generate a README.md file for the repository."""
@@ -187,7 +528,7 @@ class DocumentationGenerator:
         # Write README file
         readme_path = self.repo_path / "README.md"
         readme_path.write_text(readme_content)
-        logger.info(f"README.md created at {readme_path}")
+        logger.info("README.md created at %s", readme_path)
     
     def generate_documentation_files(self, analysis: Dict[str, Any]) -> None:
         """Generate comprehensive documentation files in the /docs directory."""
@@ -202,37 +543,202 @@ class DocumentationGenerator:
         docs_path.mkdir(exist_ok=True)
         
         # Generate different types of documentation based on analysis
-        self._generate_architecture_doc(analysis, docs_path)
-        self._generate_api_doc(analysis, docs_path)
-        self._generate_setup_doc(analysis, docs_path)
-        self._generate_usage_doc(analysis, docs_path)
+        specs = self._doc_specs()
+        if self.fuse_docs and self._generate_all_docs_fused(analysis, docs_path, specs):
+            logger.info("Documentation files created in %s", docs_path)
+            return
         
-        logger.info(f"Documentation files created in {docs_path}")
+        self._generate_docs_concurrently(analysis, docs_path, specs)
+        logger.info("Documentation files created in %s", docs_path)
+    
+    def _generate_docs_concurrently(self, analysis: Dict[str, Any], docs_path: Path, specs) -> None:
+        """Generate ``specs`` with one LLM call each, run concurrently.
+        
+        Only the documents that fit in the remaining budget are started, in
+        priority order.
+        """
+        specs = specs[:self.max_llm_calls - self.llm_calls_made]
+        if specs:
+            with ThreadPoolExecutor(max_workers=len(specs)) as executor:
+                futures = [executor.submit(self._generate_doc, analysis, docs_path, spec) for spec in specs]
+                for future in futures:
+                    future.result()
+    
+    def generate_batch(self, analysis: Dict[str, Any], include_readme: bool, timeout: float) -> bool:
+        """Generate the README (optionally) and docs/ files through the Batch API.
+        
+        All requests are submitted as one batch job, which is billed at a
+        lower rate but may take a while to complete. The job is polled with
+        exponential backoff for up to ``timeout`` seconds. Once the job has
+        completed, every returned file is written and any request that failed
+        inside the batch is retried directly, and True is returned. Returns
+        False, having written nothing, if the job did not complete in time,
+        so the caller can fall back to the synchronous path.
+        """
+        docs_path = self.repo_path / "docs"
+        jobs = []
+        if include_readme:
+            jobs.append(('README.md', self.repo_path / "README.md",
+                         self._get_readme_system_prompt(), self._prepare_readme_context(analysis)))
+        for key, filename, prepare_context, get_system_prompt in self._doc_specs():
+            jobs.append((key, docs_path / filename, get_system_prompt(), prepare_context(analysis)))
+        jobs = jobs[:self.max_llm_calls - self.llm_calls_made]
+        if not jobs:
+            logger.warning("Maximum LLM calls reached. Skipping batch generation.")
+            return False
+        
+        requests = "".join(
+            json.dumps({
+                'custom_id': custom_id,
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': self._chat_request_body(system_prompt, user_prompt),
+            }) + "\n"
+            for custom_id, _, system_prompt, user_prompt in jobs
+        )
+        batch_input = self.client.files.create(
+            file=('documentation_batch.jsonl', requests.encode('utf-8')),
+            purpose='batch'
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_input.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        logger.info("Submitted batch %s with %d requests", batch.id, len(jobs))
+        
+        deadline = time.monotonic() + timeout
+        delay = 1.0
+        while batch.status not in _BATCH_TERMINAL_STATES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Batch %s did not complete within %ss. Cancelling it.", batch.id, timeout)
+                try:
+                    self.client.batches.cancel(batch.id)
+                except Exception as e:
+                    logger.warning("Could not cancel batch %s: %s", batch.id, e)
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 60.0)
+            batch = self.client.batches.retrieve(batch.id)
+        
+        if batch.status != 'completed' or not batch.output_file_id:
+            logger.warning("Batch %s finished with status %s", batch.id, batch.status)
+            return False
+        
+        contents = {}
+        for line in self.client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            # Malformed records are left out and retried like failed requests
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            response = record.get('response') or {}
+            if response.get('status_code') != 200:
+                continue
+            choices = (response.get('body') or {}).get('choices') or [{}]
+            content = (choices[0].get('message') or {}).get('content')
+            if content is not None:
+                contents[record.get('custom_id')] = content
+        
+        docs_path.mkdir(exist_ok=True)
+        missing = []
+        for custom_id, path, _, _ in jobs:
+            content = contents.get(custom_id)
+            if content is None:
+                missing.append(custom_id)
+            else:
+                path.write_text(content)
+        with self._llm_calls_lock:
+            self.llm_calls_made += len(jobs) - len(missing)
+        logger.info("Batch %s complete. Wrote %d files.", batch.id, len(jobs) - len(missing))
+        
+        # Paid results are kept; only the requests that failed are retried
+        if missing:
+            logger.warning("Batch %s returned no content for: %s. Generating them directly.",
+                           batch.id, ', '.join(missing))
+            if 'README.md' in missing:
+                self.generate_readme(analysis)
+            specs = [spec for spec in self._doc_specs() if spec[0] in missing]
+            self._generate_docs_concurrently(analysis, docs_path, specs)
+        return True
+    
+    def _chat_request_body(self, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        """Build the chat completion parameters shared by direct and batch calls."""
+        return {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            'temperature': _LLM_TEMPERATURE,
+            'max_tokens': _LLM_MAX_TOKENS,
+        }
     
     def _call_llm(self, system_prompt: str, user_prompt: str) -> str:
-        """Make a call to the OpenAI API."""
+        """Make a call to the OpenAI API.
+        
+        When the response cache is enabled, an identical earlier request is
+        answered from disk and does not count towards ``max_llm_calls``.
+        """
+        cache_file = self._llm_cache_file(system_prompt, user_prompt)
+        if cache_file is not None:
+            try:
+                content = cache_file.read_text(encoding='utf-8')
+                logger.info("LLM response served from cache")
+                return content
+            except OSError:
+                pass
+        
         if self.llm_calls_made >= self.max_llm_calls:
             raise ValueError("Maximum LLM calls reached")
         
         try:
             response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=4000
+                **self._chat_request_body(system_prompt, user_prompt)
             )
             
-            self.llm_calls_made += 1
-            logger.info(f"LLM call {self.llm_calls_made}/{self.max_llm_calls} completed")
+            with self._llm_calls_lock:
+                self.llm_calls_made += 1
+                calls_made = self.llm_calls_made
+            logger.info("LLM call %d/%d completed", calls_made, self.max_llm_calls)
             
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
             
         except Exception as e:
-            logger.error(f"Error calling OpenAI API: {e}")
+            logger.error("Error calling OpenAI API: %s", e)
             raise
+        
+        if cache_file is not None and content is not None:
+            try:
+                _atomic_write_text(cache_file, content)
+            except OSError as e:
+                logger.debug("Could not write LLM cache %s: %s", cache_file, e)
+        return content
+    
+    def _llm_cache_file(self, system_prompt: str, user_prompt: str) -> Optional[Path]:
+        """Return the cache path for a request, or None if caching is disabled."""
+        if self.llm_cache_dir is None:
+            return None
+        key = hashlib.sha256(json.dumps(
+            [self.model, system_prompt, user_prompt, _LLM_TEMPERATURE, _LLM_MAX_TOKENS]
+        ).encode('utf-8')).hexdigest()
+        return self.llm_cache_dir / f"{key}.txt"
+    
+    @staticmethod
+    def _format_structure(analysis: Dict[str, Any]) -> str:
+        """Format the repository structure for a prompt, one path per line.
+        
+        Only the first ``_STRUCTURE_LIMIT`` paths are listed so that very large
+        repositories do not blow the prompt's token budget.
+        """
+        structure = analysis.get('structure', [])
+        lines = structure[:_STRUCTURE_LIMIT]
+        if len(structure) > _STRUCTURE_LIMIT:
+            lines.append(f"... and {len(structure) - _STRUCTURE_LIMIT} more files")
+        return '\n'.join(lines)
     
     def _prepare_readme_context(self, analysis: Dict[str, Any]) -> str:
         """Prepare context information for README generation."""
@@ -246,7 +752,7 @@ Repository Analysis:
 - Dependencies: {', '.join(analysis.get('dependencies', []))}
 
 Repository Structure:
-{chr(10).join(analysis.get('structure', []))}
+{self._format_structure(analysis)}
 
 Detail Level: {self.detail_level}
 
@@ -256,83 +762,93 @@ Please generate a comprehensive README.md file for this repository.
     
     def _get_readme_system_prompt(self) -> str:
         """Get the system prompt for README generation."""
-        detail_instructions = {
-            'low': "Provide a basic overview with minimal technical details.",
-            'medium': "Include setup instructions, basic usage, and key features.",
-            'high': "Include detailed setup instructions, code examples, architecture overview, and comprehensive feature documentation."
-        }
-        
-        return f"""You are an expert technical writer creating README.md files for software projects.
-
-Detail Level: {self.detail_level}
-Instructions: {detail_instructions.get(self.detail_level, detail_instructions['medium'])}
-
-Create a well-structured README.md that includes:
-1. Project title and description
-2. Features and capabilities
-3. Installation and setup instructions
-4. Usage examples
-5. Project structure overview
-6. Contributing guidelines (if applicable)
-7. License information (if available)
-
-Use proper Markdown formatting and make it professional and informative."""
+        return _readme_system_prompt(self.detail_level)
     
-    def _generate_architecture_doc(self, analysis: Dict[str, Any], docs_path: Path) -> None:
-        """Generate architecture documentation."""
-        if self.llm_calls_made >= self.max_llm_calls:
-            return
+    def _doc_specs(self):
+        """Return ``(key, filename, prepare_context, get_system_prompt)`` per docs/ file.
         
-        context = self._prepare_architecture_context(analysis)
-        content = self._call_llm(
-            system_prompt=self._get_architecture_system_prompt(),
-            user_prompt=context
-        )
-        
-        arch_path = docs_path / "architecture.md"
-        arch_path.write_text(content)
+        Entries are in priority order for the LLM call budget.
+        """
+        return [
+            ('architecture', 'architecture.md', self._prepare_architecture_context, self._get_architecture_system_prompt),
+            ('api', 'api.md', self._prepare_api_context, self._get_api_system_prompt),
+            ('setup', 'setup.md', self._prepare_setup_context, self._get_setup_system_prompt),
+            ('usage', 'usage.md', self._prepare_usage_context, self._get_usage_system_prompt),
+        ]
     
-    def _generate_api_doc(self, analysis: Dict[str, Any], docs_path: Path) -> None:
-        """Generate API documentation."""
+    def _generate_doc(self, analysis: Dict[str, Any], docs_path: Path, spec) -> None:
+        """Generate a single docs/ file described by a ``_doc_specs`` entry."""
         if self.llm_calls_made >= self.max_llm_calls:
             return
         
-        context = self._prepare_api_context(analysis)
+        _, filename, prepare_context, get_system_prompt = spec
         content = self._call_llm(
-            system_prompt=self._get_api_system_prompt(),
-            user_prompt=context
+            system_prompt=get_system_prompt(),
+            user_prompt=prepare_context(analysis)
         )
         
-        api_path = docs_path / "api.md"
-        api_path.write_text(content)
+        (docs_path / filename).write_text(content)
     
-    def _generate_setup_doc(self, analysis: Dict[str, Any], docs_path: Path) -> None:
-        """Generate setup documentation."""
+    def _generate_all_docs_fused(self, analysis: Dict[str, Any], docs_path: Path, specs) -> bool:
+        """Generate all ``specs`` with a single LLM call returning a JSON object.
+        
+        The shared preamble is sent once and only one round-trip is made.
+        Returns False, without writing anything, if the reply cannot be
+        parsed, so the caller can fall back to one call per document.
+        """
         if self.llm_calls_made >= self.max_llm_calls:
-            return
+            return False
         
-        context = self._prepare_setup_context(analysis)
+        keys = [key for key, _, _, _ in specs]
         content = self._call_llm(
-            system_prompt=self._get_setup_system_prompt(),
-            user_prompt=context
+            system_prompt=self._get_fused_system_prompt(specs),
+            user_prompt="\n".join(
+                f"=== {key} ===\n{prepare_context(analysis)}" for key, _, prepare_context, _ in specs
+            )
         )
         
-        setup_path = docs_path / "setup.md"
-        setup_path.write_text(content)
-    
-    def _generate_usage_doc(self, analysis: Dict[str, Any], docs_path: Path) -> None:
-        """Generate usage documentation."""
-        if self.llm_calls_made >= self.max_llm_calls:
-            return
+        documents = self._parse_fused_response(content, keys)
+        if documents is None:
+            logger.warning("Could not parse combined documentation response. Generating documents separately.")
+            return False
         
-        context = self._prepare_usage_context(analysis)
-        content = self._call_llm(
-            system_prompt=self._get_usage_system_prompt(),
-            user_prompt=context
+        for key, filename, _, _ in specs:
+            (docs_path / filename).write_text(documents[key])
+        return True
+    
+    def _get_fused_system_prompt(self, specs) -> str:
+        """Get the system prompt for generating several documents in one call."""
+        keys = ', '.join(f'"{key}"' for key, _, _, _ in specs)
+        instructions = "\n\n".join(
+            f'Instructions for "{key}":\n{get_system_prompt()}' for key, _, _, get_system_prompt in specs
         )
+        return f"""You are an expert technical writer creating several documentation files for a software project in a single response.
+
+The user message contains one context section per document, headed "=== <key> ===".
+Respond with only a JSON object with the keys {keys}. Each value must be the complete Markdown content of that document.
+
+{instructions}"""
+    
+    @staticmethod
+    def _parse_fused_response(content: Optional[str], keys: List[str]) -> Optional[Dict[str, str]]:
+        """Parse a combined response into ``{key: markdown}``, or None if malformed.
         
-        usage_path = docs_path / "usage.md"
-        usage_path.write_text(content)
+        ``content`` is None when the API returned no message text, for example
+        on a refusal.
+        """
+        if not content:
+            return None
+        text = content.strip()
+        # Tolerate the reply being wrapped in a Markdown code fence
+        if text.startswith('```'):
+            text = text.split('\n', 1)[-1].rsplit('```', 1)[0]
+        try:
+            documents = json.loads(text)
+        except ValueError:
+            return None
+        if not isinstance(documents, dict) or not all(isinstance(documents.get(key), str) for key in keys):
+            return None
+        return documents
     
     def _prepare_architecture_context(self, analysis: Dict[str, Any]) -> str:
         """Prepare context for architecture documentation."""
@@ -341,7 +857,7 @@ Repository Analysis for Architecture Documentation:
 - Project Type: {analysis.get('project_type', 'Unknown')}
 - Languages: {', '.join(analysis.get('languages', []))}
 - Main Files: {', '.join(analysis.get('main_files', []))}
-- File Structure: {chr(10).join(analysis.get('structure', []))}
+- File Structure: {self._format_structure(analysis)}
 
 Detail Level: {self.detail_level}
 
@@ -450,11 +966,20 @@ Provide practical examples and real-world scenarios."""
 class DocumentationBot:
     """Main class that orchestrates the documentation generation process."""
     
-    def __init__(self, repo_path: str, detail_level: str = "medium", max_llm_calls: int = 20):
-        """Initialize the documentation bot."""
+    def __init__(self, repo_path: str, detail_level: str = "medium", max_llm_calls: int = 20,
+                 fuse_docs: bool = False, batch: bool = False, batch_timeout: float = 3600):
+        """Initialize the documentation bot.
+        
+        With ``batch`` all documents are requested through the OpenAI Batch
+        API, falling back to direct calls if the job has not completed after
+        ``batch_timeout`` seconds.
+        """
         self.repo_path = Path(repo_path)
         self.detail_level = detail_level
         self.max_llm_calls = max_llm_calls
+        self.fuse_docs = fuse_docs
+        self.batch = batch
+        self.batch_timeout = batch_timeout
         
         # Validate inputs
         if not self.repo_path.exists():
@@ -466,6 +991,13 @@ class DocumentationBot:
         if max_llm_calls <= 0:
             raise ValueError("Max LLM calls must be positive")
         
+        if batch_timeout < 0:
+            raise ValueError("Batch timeout must not be negative")
+        
+        # Load .env before anything reads its settings, so the analyzer's
+        # cache options are honoured as well as the generator's
+        _load_dotenv()
+        
         # Initialize analyzer (doesn't require OpenAI)
         self.analyzer = RepositoryAnalyzer(self.repo_path)
         # Initialize generator only when needed
@@ -474,21 +1006,33 @@ class DocumentationBot:
     def _get_generator(self):
         """Get or create the DocumentationGenerator instance."""
         if self.generator is None:
-            self.generator = DocumentationGenerator(self.repo_path, self.detail_level, self.max_llm_calls)
+            self.generator = DocumentationGenerator(
+                self.repo_path, self.detail_level, self.max_llm_calls, fuse_docs=self.fuse_docs
+            )
         return self.generator
     
     def generate_documentation(self) -> None:
         """Generate comprehensive documentation for the repository."""
-        logger.info(f"Starting documentation generation for: {self.repo_path}")
-        logger.info(f"Detail level: {self.detail_level}, Max LLM calls: {self.max_llm_calls}")
+        logger.info("Starting documentation generation for: %s", self.repo_path)
+        logger.info("Detail level: %s, Max LLM calls: %d", self.detail_level, self.max_llm_calls)
         
         try:
             # Step 1: Analyze the repository
             analysis = self.analyzer.analyze()
-            logger.info(f"Repository analysis complete. Found {len(analysis['structure'])} files.")
+            logger.info("Repository analysis complete. Found %d files.", len(analysis['structure']))
             
-            # Step 2: Generate README.md if it doesn't exist
             readme_path = self.repo_path / "README.md"
+            
+            # Optionally generate everything in a single Batch API job
+            if self.batch:
+                generator = self._get_generator()
+                if generator.generate_batch(analysis, not readme_path.exists(), self.batch_timeout):
+                    logger.info("Documentation generation complete!")
+                    logger.info("Total LLM calls made: %d", generator.llm_calls_made)
+                    return
+                logger.info("Falling back to direct LLM calls.")
+            
+            # Step 2: Generate README.md if it doesn't exist
             if not readme_path.exists():
                 generator = self._get_generator()
                 generator.generate_readme(analysis)
@@ -500,15 +1044,17 @@ class DocumentationBot:
             generator.generate_documentation_files(analysis)
             
             logger.info("Documentation generation complete!")
-            logger.info(f"Total LLM calls made: {generator.llm_calls_made}")
+            logger.info("Total LLM calls made: %d", generator.llm_calls_made)
             
         except Exception as e:
-            logger.error(f"Error during documentation generation: {e}")
+            logger.error("Error during documentation generation: %s", e)
             raise
 
 
 def main():
     """Main entry point for the command-line interface."""
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="Generate comprehensive documentation for a code repository"
     )
@@ -529,6 +1075,22 @@ def main():
         default=20,
         help="Maximum number of LLM API calls (default: 20)"
     )
+    parser.add_argument(
+        "--fuse-docs",
+        action="store_true",
+        help="Request all /docs files in a single LLM call (falls back to one call per file)"
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit all requests as one OpenAI Batch API job (cheaper, but slower)"
+    )
+    parser.add_argument(
+        "--batch-timeout",
+        type=float,
+        default=3600,
+        help="Seconds to wait for a --batch job before falling back to direct calls (default: 3600)"
+    )
     
     args = parser.parse_args()
     
@@ -536,12 +1098,15 @@ def main():
         bot = DocumentationBot(
             repo_path=args.repo_path,
             detail_level=args.detail_level,
-            max_llm_calls=args.max_llm_calls
+            max_llm_calls=args.max_llm_calls,
+            fuse_docs=args.fuse_docs,
+            batch=args.batch,
+            batch_timeout=args.batch_timeout
         )
         bot.generate_documentation()
         
     except Exception as e:
-        logger.error(f"Error: {e}")
+        logger.error("Error: %s", e)
         sys.exit(1)
 
 
@@ -6,6 +6,14 @@ Setup script for the Documentation Bot package.
 from setuptools import setup, find_packages
 import os
 
+# Set DOCBOT_MYPYC=1 to compile documentation_bot.py with mypyc (requires
+# mypy). The default build installs the pure-Python module.
+if os.getenv("DOCBOT_MYPYC") == "1":
+    from mypyc.build import mypycify
+    ext_modules = mypycify(["--ignore-missing-imports", "documentation_bot.py"])
+else:
+    ext_modules = []
+
 # Read the README file
 def read_readme():
     with open("README.md", "r", encoding="utf-8") as fh:
@@ -26,6 +34,8 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/documentation-bot",
     packages=find_packages(),
+    py_modules=["documentation_bot"],
+    ext_modules=ext_modules,
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -4,34 +4,54 @@ Basic tests for the documentation bot that don't require external dependencies.
 """
 
 import unittest
-import tempfile
 import os
-import shutil
-from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 # Import the classes we'll test
 from documentation_bot import RepositoryAnalyzer, DocumentationBot
+from test_support import CACHE_DIR, make_files, make_test_dir
+
+# Fixture file contents, encoded once at import
+_HELLO_PY = b"print('Hello, World!')"
+_PRINT_PY = b"print('hello')"
+_HELPER_PY = b"def helper(): pass"
+_REQ_TXT = b"requests==2.28.0\nflask==2.3.0"
+_DEBUG_JSON = b'{"debug": true}'
 
 
 class TestRepositoryAnalyzerBasic(unittest.TestCase):
     """Basic test cases for RepositoryAnalyzer that don't require OpenAI."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Create one analyzer that each test rebinds to its own repository."""
+        cls.analyzer = RepositoryAnalyzer(
+            make_test_dir(f"{cls.__module__}.{cls.__qualname__}"), cache_dir=CACHE_DIR
+        )
+    
     def setUp(self):
         """Set up test environment."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.repo_path = Path(self.temp_dir) / "test_repo"
-        self.repo_path.mkdir()
+        self.temp_dir = make_test_dir(self.id())
+        self.repo_path = self.temp_dir / "test_repo"
+        self.repo_path.mkdir(exist_ok=True)
+        self.analyzer.rebind(self.repo_path)
         
-    def tearDown(self):
-        """Clean up test environment."""
-        shutil.rmtree(self.temp_dir)
-    
     def test_initialization_with_valid_repo_path(self):
         """Test that RepositoryAnalyzer initializes correctly with valid repo path."""
         analyzer = RepositoryAnalyzer(self.repo_path)
         self.assertEqual(analyzer.repo_path, self.repo_path)
     
+    def test_rebind(self):
+        """Test that rebind points the analyzer at a different repository."""
+        other_path = self.temp_dir / "other_repo"
+        other_path.mkdir()
+        make_files(other_path, {"main.py": b"print('Hello')"})
+        
+        self.analyzer.rebind(other_path)
+        
+        self.assertEqual(self.analyzer.repo_path, other_path)
+        self.assertEqual(self.analyzer.analyze()['structure'], ['main.py'])
+    
     def test_initialization_with_invalid_repo_path(self):
         """Test that RepositoryAnalyzer raises error with invalid repo path."""
         with self.assertRaises(ValueError):
@@ -39,8 +59,7 @@ class TestRepositoryAnalyzerBasic(unittest.TestCase):
     
     def test_analyze_empty_repository(self):
         """Test analyzing an empty repository."""
-        analyzer = RepositoryAnalyzer(self.repo_path)
-        result = analyzer.analyze()
+        result = self.analyzer.analyze()
         
         self.assertIsInstance(result, dict)
         self.assertIn('file_types', result)
@@ -59,12 +78,13 @@ class TestRepositoryAnalyzerBasic(unittest.TestCase):
     def test_analyze_python_repository(self):
         """Test analyzing a Python repository."""
         # Create some Python files
-        (self.repo_path / "main.py").write_text("print('Hello, World!')")
-        (self.repo_path / "utils.py").write_text("def helper(): pass")
-        (self.repo_path / "requirements.txt").write_text("requests==2.28.0\nflask==2.3.0")
+        make_files(self.repo_path, {
+            "main.py": _HELLO_PY,
+            "utils.py": _HELPER_PY,
+            "requirements.txt": _REQ_TXT,
+        })
         
-        analyzer = RepositoryAnalyzer(self.repo_path)
-        result = analyzer.analyze()
+        result = self.analyzer.analyze()
         
         self.assertIn('.py', result['file_types'])
         self.assertIn('.txt', result['file_types'])
@@ -78,17 +98,37 @@ class TestRepositoryAnalyzerBasic(unittest.TestCase):
         self.assertIn('flask==2.3.0', result['dependencies'])
         self.assertEqual(result['project_type'], 'Python')
     
+    def test_requirements_parsing(self):
+        """Test that only pinned, uncommented requirements are extracted."""
+        make_files(self.repo_path, {
+            "requirements.txt": (
+                b"\xef\xbb\xbfclick==8.1.7\n"
+                b"# pinned==0.0.1\n"
+                b"flask==2.3.0  # web framework\n"
+                b"  uvicorn[standard]==0.23.2\n"
+                b"jinja2 == 3.1.2\n"
+                b"requests>=2.28.0\n"
+            ),
+        })
+        
+        result = self.analyzer.analyze()
+        
+        self.assertEqual(result['dependencies'], [
+            'click==8.1.7', 'flask==2.3.0', 'uvicorn[standard]==0.23.2', 'jinja2==3.1.2',
+        ])
+    
     def test_analyze_mixed_repository(self):
         """Test analyzing a repository with multiple file types."""
         # Create various file types
-        (self.repo_path / "app.py").write_text("from flask import Flask")
-        (self.repo_path / "index.html").write_text("<html></html>")
-        (self.repo_path / "style.css").write_text("body { margin: 0; }")
-        (self.repo_path / "config.json").write_text('{"debug": true}')
-        (self.repo_path / "package.json").write_text('{"name": "test-app"}')
+        make_files(self.repo_path, {
+            "app.py": b"from flask import Flask",
+            "index.html": b"<html></html>",
+            "style.css": b"body { margin: 0; }",
+            "config.json": _DEBUG_JSON,
+            "package.json": b'{"name": "test-app"}',
+        })
         
-        analyzer = RepositoryAnalyzer(self.repo_path)
-        result = analyzer.analyze()
+        result = self.analyzer.analyze()
         
         self.assertIn('.py', result['file_types'])
         self.assertIn('.html', result['file_types'])
@@ -107,28 +147,86 @@ class TestRepositoryAnalyzerBasic(unittest.TestCase):
     def test_ignore_binary_files(self):
         """Test that binary files are ignored."""
         # Create a binary-like file with null bytes
-        (self.repo_path / "image.jpg").write_bytes(b'\xff\xd8\xff\xe0\x00\x00\x00\x00')
-        (self.repo_path / "data.py").write_text("import os")
+        make_files(self.repo_path, {
+            "image.jpg": b'\xff\xd8\xff\xe0\x00\x00\x00\x00',
+            "data.py": b"import os",
+        })
         
-        analyzer = RepositoryAnalyzer(self.repo_path)
-        result = analyzer.analyze()
+        result = self.analyzer.analyze()
         
         self.assertIn('.py', result['file_types'])
         self.assertNotIn('.jpg', result['file_types'])
         self.assertIn('data.py', result['structure'])
         self.assertNotIn('image.jpg', result['structure'])
     
+    def test_known_text_files_are_not_probed(self):
+        """Test that files with known text extensions skip the binary probe."""
+        make_files(self.repo_path, {
+            "main.py": _PRINT_PY,
+            "notes.md": b"# Notes",
+        })
+        
+        with patch('documentation_bot.os.open', wraps=os.open) as mock_open:
+            result = self.analyzer.analyze()
+        
+        opened = [str(call.args[0]) for call in mock_open.call_args_list]
+        self.assertFalse([path for path in opened if path.startswith(str(self.repo_path))])
+        self.assertIn('main.py', result['structure'])
+        self.assertIn('notes.md', result['structure'])
+    
+    def test_analysis_is_cached_until_repository_changes(self):
+        """Test that an unchanged repository reuses the cached analysis."""
+        make_files(self.repo_path, {
+            "main.py": _PRINT_PY,
+        })
+        cache_dir = self.temp_dir / "cache"
+        
+        first = RepositoryAnalyzer(self.repo_path, cache_dir=cache_dir).analyze()
+        with patch.object(RepositoryAnalyzer, '_probe') as mock_probe:
+            second = RepositoryAnalyzer(self.repo_path, cache_dir=cache_dir).analyze()
+        mock_probe.assert_not_called()
+        self.assertEqual(first, second)
+        
+        make_files(self.repo_path, {
+            "utils.py": _HELPER_PY,
+        })
+        third = RepositoryAnalyzer(self.repo_path, cache_dir=cache_dir).analyze()
+        self.assertIn('utils.py', third['structure'])
+        # The stale entry is replaced rather than kept alongside the new one
+        self.assertEqual(len(list(cache_dir.iterdir())), 1)
+    
+    def test_analysis_cache_can_be_disabled(self):
+        """Test that DOCBOT_ANALYSIS_CACHE=0 turns the analysis cache off."""
+        make_files(self.repo_path, {
+            "main.py": _PRINT_PY,
+        })
+        cache_dir = self.temp_dir / "cache"
+        
+        with patch.dict(os.environ, {'DOCBOT_ANALYSIS_CACHE': '0'}):
+            result = RepositoryAnalyzer(self.repo_path, cache_dir=cache_dir).analyze()
+        
+        self.assertIn('main.py', result['structure'])
+        self.assertFalse(cache_dir.exists())
+    
     def test_ignore_large_files(self):
         """Test that large files are ignored."""
-        # Create a large file (over 1MB)
-        large_file = self.repo_path / "large_file.txt"
-        large_content = "x" * (1024 * 1024 + 100)  # Just over 1MB
-        large_file.write_text(large_content)
+        # An empty placeholder that the analyzer is told is just over 1MB
+        make_files(self.repo_path, {
+            "large_file.txt": b"",
+            "small_file.py": _PRINT_PY,
+        })
+        real_stat = RepositoryAnalyzer._stat
         
-        (self.repo_path / "small_file.py").write_text("print('hello')")
+        def fake_stat(entry):
+            st = real_stat(entry)
+            if entry.name != "large_file.txt":
+                return st
+            fields = list(st)
+            fields[6] = 1024 * 1024 + 100  # st_size
+            return os.stat_result(fields, {'st_mtime_ns': st.st_mtime_ns})
         
-        analyzer = RepositoryAnalyzer(self.repo_path)
-        result = analyzer.analyze()
+        with patch.object(RepositoryAnalyzer, '_stat', side_effect=fake_stat):
+            result = self.analyzer.analyze()
         
         self.assertIn('.py', result['file_types'])
         self.assertNotIn('.txt', result['file_types'])
@@ -137,22 +235,17 @@ class TestRepositoryAnalyzerBasic(unittest.TestCase):
     
     def test_ignore_common_directories(self):
         """Test that common directories are ignored."""
-        # Create ignored directories
-        (self.repo_path / ".git").mkdir()
-        (self.repo_path / ".git" / "config").write_text("git config")
-        
-        (self.repo_path / "__pycache__").mkdir()
-        (self.repo_path / "__pycache__" / "test.pyc").write_bytes(b'\x00\x00\x00\x00')
+        make_files(self.repo_path, {
+            # Files in ignored directories
+            ".git/config": b"git config",
+            "__pycache__/test.pyc": b'\x00\x00\x00\x00',
+            "node_modules/package.json": b'{"name": "test"}',
+            # Regular files
+            "main.py": _PRINT_PY,
+            "README.md": b"# Test",
+        })
         
-        (self.repo_path / "node_modules").mkdir()
-        (self.repo_path / "node_modules" / "package.json").write_text('{"name": "test"}')
-        
-        # Create regular files
-        (self.repo_path / "main.py").write_text("print('hello')")
-        (self.repo_path / "README.md").write_text("# Test")
-        
-        analyzer = RepositoryAnalyzer(self.repo_path)
-        result = analyzer.analyze()
+        result = self.analyzer.analyze()
         
         self.assertIn('.py', result['file_types'])
         self.assertIn('.md', result['file_types'])
@@ -165,66 +258,59 @@ class TestRepositoryAnalyzerBasic(unittest.TestCase):
         self.assertNotIn('node_modules/package.json', result['structure'])
 
 
-class TestDocumentationBotBasic(unittest.TestCase):
-    """Basic test cases for DocumentationBot that don't require OpenAI."""
+class TestDocumentationBotInit(unittest.TestCase):
+    """Validation of DocumentationBot constructor arguments (no OpenAI required)."""
     
-    def setUp(self):
-        """Set up test environment."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.repo_path = Path(self.temp_dir) / "test_repo"
-        self.repo_path.mkdir()
-        
-    def tearDown(self):
-        """Clean up test environment."""
-        shutil.rmtree(self.temp_dir)
+    # (repo_path, detail_level, max_llm_calls, batch_timeout, expected ValueError
+    # message). A repo_path of None stands for the class's test repository.
+    CASES = [
+        (None, "low", 10, 3600, None),
+        (None, "medium", 10, 3600, None),
+        (None, "high", 10, 0, None),
+        ("/nonexistent/path", "medium", 10, 3600, "does not exist"),
+        (None, "invalid", 10, 3600, "Detail level must be"),
+        (None, "medium", 0, 3600, "Max LLM calls must be positive"),
+        (None, "medium", -1, 3600, "Max LLM calls must be positive"),
+        (None, "medium", 10, -1, "Batch timeout must not be negative"),
+    ]
     
-    def test_initialization_with_valid_repo_path(self):
-        """Test that DocumentationBot initializes correctly with valid repo path."""
-        bot = DocumentationBot(
-            repo_path=str(self.repo_path),
-            detail_level="medium",
-            max_llm_calls=10
-        )
-        self.assertEqual(bot.repo_path, self.repo_path)
-        self.assertEqual(bot.detail_level, "medium")
-        self.assertEqual(bot.max_llm_calls, 10)
+    @classmethod
+    def setUpClass(cls):
+        """Create the repository shared by every case."""
+        cls.repo_path = make_test_dir(f"{cls.__module__}.{cls.__qualname__}") / "test_repo"
+        cls.repo_path.mkdir(exist_ok=True)
     
-    def test_initialization_with_invalid_repo_path(self):
-        """Test that DocumentationBot raises error with invalid repo path."""
-        with self.assertRaises(ValueError):
-            DocumentationBot(
-                repo_path="/nonexistent/path",
-                detail_level="medium",
-                max_llm_calls=10
-            )
-    
-    def test_invalid_detail_level(self):
-        """Test that DocumentationBot raises error with invalid detail level."""
-        with self.assertRaises(ValueError):
-            DocumentationBot(
-                repo_path=str(self.repo_path),
-                detail_level="invalid",
-                max_llm_calls=10
-            )
-    
-    def test_invalid_max_llm_calls(self):
-        """Test that DocumentationBot raises error with invalid max_llm_calls."""
-        with self.assertRaises(ValueError):
-            DocumentationBot(
-                repo_path=str(self.repo_path),
-                detail_level="medium",
-                max_llm_calls=-1
-            )
-    
-    def test_valid_detail_levels(self):
-        """Test that all valid detail levels work."""
-        for level in ["low", "medium", "high"]:
-            bot = DocumentationBot(
-                repo_path=str(self.repo_path),
-                detail_level=level,
-                max_llm_calls=10
-            )
-            self.assertEqual(bot.detail_level, level)
+    def test_initialization(self):
+        """Test that valid arguments are stored and invalid ones raise ValueError."""
+        for repo_path, detail_level, max_llm_calls, batch_timeout, error in self.CASES:
+            with self.subTest(repo_path=repo_path, detail_level=detail_level,
+                              max_llm_calls=max_llm_calls, batch_timeout=batch_timeout):
+                kwargs = {
+                    'repo_path': repo_path or str(self.repo_path),
+                    'detail_level': detail_level,
+                    'max_llm_calls': max_llm_calls,
+                    'batch_timeout': batch_timeout,
+                }
+                if error:
+                    with self.assertRaisesRegex(ValueError, error):
+                        DocumentationBot(**kwargs)
+                    continue
+                
+                bot = DocumentationBot(**kwargs)
+                self.assertEqual(bot.repo_path, self.repo_path)
+                self.assertEqual(bot.detail_level, detail_level)
+                self.assertEqual(bot.max_llm_calls, max_llm_calls)
+                self.assertEqual(bot.batch_timeout, batch_timeout)
+    
+    def test_dotenv_is_loaded_before_the_analyzer(self):
+        """Test that analyzer settings from .env are applied."""
+        def load_dotenv():
+            os.environ['DOCBOT_ANALYSIS_CACHE'] = '0'
+        
+        with patch.dict(os.environ), patch('documentation_bot._load_dotenv', side_effect=load_dotenv):
+            bot = DocumentationBot(repo_path=str(self.repo_path))
+        
+        self.assertIsNone(bot.analyzer.cache_dir)
 
 
 if __name__ == '__main__':
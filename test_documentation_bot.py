@@ -1,80 +1,54 @@
 import unittest
-import tempfile
 import os
-import shutil
+import json
 from unittest.mock import patch, MagicMock
-from pathlib import Path
 
 # Import the main classes we'll create
-from documentation_bot import DocumentationBot, RepositoryAnalyzer, DocumentationGenerator
+import documentation_bot
+from documentation_bot import RepositoryAnalyzer, DocumentationGenerator
+from test_support import CACHE_DIR, make_files, make_test_dir
 
+# Fixture file contents, encoded once at import
+_HELLO_PY = b"print('Hello, World!')"
+_FLASK_PY = b"from flask import Flask"
+_DEBUG_JSON = b'{"debug": true}'
 
-class TestDocumentationBot(unittest.TestCase):
-    """Test cases for the main DocumentationBot class."""
-    
-    def setUp(self):
-        """Set up test environment."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.repo_path = Path(self.temp_dir) / "test_repo"
-        self.repo_path.mkdir()
-        
-    def tearDown(self):
-        """Clean up test environment."""
-        shutil.rmtree(self.temp_dir)
-    
-    def test_initialization_with_valid_repo_path(self):
-        """Test that DocumentationBot initializes correctly with valid repo path."""
-        bot = DocumentationBot(
-            repo_path=str(self.repo_path),
-            detail_level="medium",
-            max_llm_calls=10
-        )
-        self.assertEqual(bot.repo_path, self.repo_path)
-        self.assertEqual(bot.detail_level, "medium")
-        self.assertEqual(bot.max_llm_calls, 10)
-    
-    def test_initialization_with_invalid_repo_path(self):
-        """Test that DocumentationBot raises error with invalid repo path."""
-        with self.assertRaises(ValueError):
-            DocumentationBot(
-                repo_path="/nonexistent/path",
-                detail_level="medium",
-                max_llm_calls=10
-            )
-    
-    def test_invalid_detail_level(self):
-        """Test that DocumentationBot raises error with invalid detail level."""
-        with self.assertRaises(ValueError):
-            DocumentationBot(
-                repo_path=str(self.repo_path),
-                detail_level="invalid",
-                max_llm_calls=10
-            )
-    
-    def test_invalid_max_llm_calls(self):
-        """Test that DocumentationBot raises error with invalid max_llm_calls."""
-        with self.assertRaises(ValueError):
-            DocumentationBot(
-                repo_path=str(self.repo_path),
-                detail_level="medium",
-                max_llm_calls=-1
-            )
+# One stub client shared by every generator built in this module
+_STUB_CLIENT = MagicMock()
+_ORIGINAL_OPENAI = {}
+
+
+def setUpModule():
+    """Install the stub OpenAI client once for the whole module."""
+    _ORIGINAL_OPENAI['OpenAI'] = documentation_bot.OpenAI
+    _ORIGINAL_OPENAI['openai_available'] = documentation_bot.openai_available
+    documentation_bot.OpenAI = lambda **kwargs: _STUB_CLIENT
+    documentation_bot.openai_available = True
+
+
+def tearDownModule():
+    """Restore the real OpenAI client."""
+    for name, value in _ORIGINAL_OPENAI.items():
+        setattr(documentation_bot, name, value)
 
 
 class TestRepositoryAnalyzer(unittest.TestCase):
     """Test cases for the RepositoryAnalyzer class."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Create one analyzer that each test rebinds to its own repository."""
+        cls.analyzer = RepositoryAnalyzer(
+            make_test_dir(f"{cls.__module__}.{cls.__qualname__}"), cache_dir=CACHE_DIR
+        )
+    
     def setUp(self):
         """Set up test environment."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.repo_path = Path(self.temp_dir) / "test_repo"
-        self.repo_path.mkdir()
-        self.analyzer = RepositoryAnalyzer(self.repo_path)
-        
-    def tearDown(self):
-        """Clean up test environment."""
-        shutil.rmtree(self.temp_dir)
-    
+        self.temp_dir = make_test_dir(self.id())
+        self.repo_path = self.temp_dir / "test_repo"
+        self.repo_path.mkdir(exist_ok=True)
+        self.analyzer.rebind(self.repo_path)
+        
     def test_analyze_empty_repository(self):
         """Test analyzing an empty repository."""
         result = self.analyzer.analyze()
@@ -87,9 +61,11 @@ class TestRepositoryAnalyzer(unittest.TestCase):
     def test_analyze_python_repository(self):
         """Test analyzing a Python repository."""
         # Create some Python files
-        (self.repo_path / "main.py").write_text("print('Hello, World!')")
-        (self.repo_path / "utils.py").write_text("def helper(): pass")
-        (self.repo_path / "requirements.txt").write_text("requests==2.28.0")
+        make_files(self.repo_path, {
+            "main.py": _HELLO_PY,
+            "utils.py": b"def helper(): pass",
+            "requirements.txt": b"requests==2.28.0",
+        })
         
         result = self.analyzer.analyze()
         self.assertIn('.py', result['file_types'])
@@ -99,10 +75,12 @@ class TestRepositoryAnalyzer(unittest.TestCase):
     def test_analyze_mixed_repository(self):
         """Test analyzing a repository with multiple file types."""
         # Create various file types
-        (self.repo_path / "app.py").write_text("from flask import Flask")
-        (self.repo_path / "index.html").write_text("<html></html>")
-        (self.repo_path / "style.css").write_text("body { margin: 0; }")
-        (self.repo_path / "config.json").write_text('{"debug": true}')
+        make_files(self.repo_path, {
+            "app.py": _FLASK_PY,
+            "index.html": b"<html></html>",
+            "style.css": b"body { margin: 0; }",
+            "config.json": _DEBUG_JSON,
+        })
         
         result = self.analyzer.analyze()
         self.assertIn('.py', result['file_types'])
@@ -113,8 +91,10 @@ class TestRepositoryAnalyzer(unittest.TestCase):
     def test_ignore_binary_files(self):
         """Test that binary files are ignored."""
         # Create a binary-like file
-        (self.repo_path / "image.jpg").write_bytes(b'\xff\xd8\xff\xe0')
-        (self.repo_path / "data.py").write_text("import os")
+        make_files(self.repo_path, {
+            "image.jpg": b'\xff\xd8\xff\xe0\x00\x00\x00\x00',
+            "data.py": b"import os",
+        })
         
         result = self.analyzer.analyze()
         self.assertIn('.py', result['file_types'])
@@ -124,11 +104,17 @@ class TestRepositoryAnalyzer(unittest.TestCase):
 class TestDocumentationGenerator(unittest.TestCase):
     """Test cases for the DocumentationGenerator class."""
     
+    # Canned reply returned by the stub client; tests override it per instance
+    response_content = "# Test README\n\nThis is a test."
+    
     def setUp(self):
         """Set up test environment."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.repo_path = Path(self.temp_dir) / "test_repo"
-        self.repo_path.mkdir()
+        self.temp_dir = make_test_dir(self.id())
+        self.repo_path = self.temp_dir / "test_repo"
+        self.repo_path.mkdir(exist_ok=True)
+        
+        _STUB_CLIENT.reset_mock(return_value=True, side_effect=True)
+        _STUB_CLIENT.chat.completions.create.side_effect = self._completion
         
         # Mock environment variables for testing
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
@@ -137,67 +123,214 @@ class TestDocumentationGenerator(unittest.TestCase):
                 detail_level="medium",
                 max_llm_calls=10
             )
-        
-    def tearDown(self):
-        """Clean up test environment."""
-        shutil.rmtree(self.temp_dir)
     
-    @patch('documentation_bot.openai_available', True)
-    @patch('documentation_bot.OpenAI')
-    def test_generate_readme(self, mock_openai_class):
+    def _completion(self, **kwargs):
+        """Build a chat completion carrying the current canned reply."""
+        response = MagicMock()
+        response.choices[0].message.content = self.response_content
+        return response
+        
+    def test_generate_readme(self):
         """Test generating a README.md file."""
-        # Mock the OpenAI client
-        mock_client = MagicMock()
-        mock_openai_class.return_value = mock_client
+        # Create some files to analyze
+        make_files(self.repo_path, {
+            "main.py": b"print('Hello')",
+        })
         
-        # Mock the response
-        mock_response = MagicMock()
-        mock_response.choices[0].message.content = "# Test README\n\nThis is a test."
-        mock_client.chat.completions.create.return_value = mock_response
+        self.generator.generate_readme({'structure': ['main.py']})
+        
+        readme_path = self.repo_path / "README.md"
+        self.assertTrue(readme_path.exists())
+        self.assertIn("Test README", readme_path.read_text())
+    
+    def test_generate_documentation_files(self):
+        """Test generating documentation files in /docs directory."""
+        self.response_content = "# API Documentation\n\nTest content."
         
         # Create some files to analyze
-        (self.repo_path / "main.py").write_text("print('Hello')")
+        make_files(self.repo_path, {
+            "app.py": _FLASK_PY,
+            "models.py": b"class User: pass",
+        })
+        
+        self.generator.generate_documentation_files({'structure': ['app.py', 'models.py']})
+        
+        docs_path = self.repo_path / "docs"
+        self.assertTrue(docs_path.exists())
+        self.assertTrue(docs_path.is_dir())
+    
+    def test_generate_documentation_files_respects_llm_budget(self):
+        """Test that concurrent doc generation stays within max_llm_calls."""
+        self.response_content = "# Doc"
         
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
             generator = DocumentationGenerator(
                 repo_path=self.repo_path,
                 detail_level="medium",
-                max_llm_calls=10
+                max_llm_calls=2
             )
-            generator.generate_readme({'structure': ['main.py']})
+            generator.generate_documentation_files({'structure': ['app.py']})
         
-        readme_path = self.repo_path / "README.md"
-        self.assertTrue(readme_path.exists())
-        self.assertIn("Test README", readme_path.read_text())
+        self.assertEqual(_STUB_CLIENT.chat.completions.create.call_count, 2)
+        self.assertEqual(generator.llm_calls_made, 2)
+        docs_path = self.repo_path / "docs"
+        self.assertTrue((docs_path / "architecture.md").exists())
+        self.assertTrue((docs_path / "api.md").exists())
+        self.assertFalse((docs_path / "setup.md").exists())
+        self.assertFalse((docs_path / "usage.md").exists())
     
-    @patch('documentation_bot.openai_available', True)
-    @patch('documentation_bot.OpenAI')
-    def test_generate_documentation_files(self, mock_openai_class):
-        """Test generating documentation files in /docs directory."""
-        # Mock the OpenAI client
-        mock_client = MagicMock()
-        mock_openai_class.return_value = mock_client
+    def test_generate_documentation_files_fused(self):
+        """Test that fused generation writes every doc from a single LLM call."""
+        self.response_content = json.dumps({
+            'architecture': '# Architecture',
+            'api': '# API',
+            'setup': '# Setup',
+            'usage': '# Usage',
+        })
         
-        # Mock the response
-        mock_response = MagicMock()
-        mock_response.choices[0].message.content = "# API Documentation\n\nTest content."
-        mock_client.chat.completions.create.return_value = mock_response
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            generator = DocumentationGenerator(
+                repo_path=self.repo_path,
+                detail_level="medium",
+                max_llm_calls=10,
+                fuse_docs=True
+            )
+            generator.generate_documentation_files({'structure': ['app.py']})
         
-        # Create some files to analyze
-        (self.repo_path / "app.py").write_text("from flask import Flask")
-        (self.repo_path / "models.py").write_text("class User: pass")
+        self.assertEqual(_STUB_CLIENT.chat.completions.create.call_count, 1)
+        docs_path = self.repo_path / "docs"
+        self.assertEqual((docs_path / "api.md").read_text(), "# API")
+        self.assertEqual((docs_path / "usage.md").read_text(), "# Usage")
+    
+    def test_generate_documentation_files_fused_fallback(self):
+        """Test that an unparseable fused reply falls back to one call per doc."""
+        self.response_content = "# Not JSON"
         
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
             generator = DocumentationGenerator(
                 repo_path=self.repo_path,
                 detail_level="medium",
-                max_llm_calls=10
+                max_llm_calls=10,
+                fuse_docs=True
             )
-            generator.generate_documentation_files({'structure': ['app.py', 'models.py']})
+            generator.generate_documentation_files({'structure': ['app.py']})
+        
+        self.assertEqual(_STUB_CLIENT.chat.completions.create.call_count, 5)
+        self.assertEqual((self.repo_path / "docs" / "setup.md").read_text(), "# Not JSON")
+    
+    def test_parse_fused_response_without_content(self):
+        """Test that an empty fused reply is treated as unparseable."""
+        self.assertIsNone(DocumentationGenerator._parse_fused_response(None, ['api']))
+        self.assertIsNone(DocumentationGenerator._parse_fused_response("", ['api']))
+    
+    def test_llm_response_cache(self):
+        """Test that cached LLM responses are reused and not counted as calls."""
+        self.response_content = "# Cached README"
+        
+        env = {
+            'OPENAI_API_KEY': 'test-key',
+            'DOCBOT_CACHE': '1',
+            'XDG_CACHE_HOME': str(self.temp_dir / "cache"),
+        }
+        with patch.dict(os.environ, env):
+            first = DocumentationGenerator(self.repo_path, "medium", 10)
+            first.generate_readme({'structure': ['main.py']})
+            second = DocumentationGenerator(self.repo_path, "medium", 10)
+            second.generate_readme({'structure': ['main.py']})
         
+        self.assertEqual(_STUB_CLIENT.chat.completions.create.call_count, 1)
+        self.assertEqual(first.llm_calls_made, 1)
+        self.assertEqual(second.llm_calls_made, 0)
+        self.assertEqual((self.repo_path / "README.md").read_text(), "# Cached README")
+    
+    def test_generate_batch(self):
+        """Test that a completed batch job writes the README and docs files."""
+        _STUB_CLIENT.batches.create.return_value = MagicMock(
+            id='batch_1', status='completed', output_file_id='file_out'
+        )
+        _STUB_CLIENT.files.content.return_value.text = "\n".join(
+            json.dumps({
+                'custom_id': custom_id,
+                'response': {
+                    'status_code': 200,
+                    'body': {'choices': [{'message': {'content': f"# {custom_id}"}}]},
+                },
+            })
+            for custom_id in ['README.md', 'architecture', 'api', 'setup', 'usage']
+        )
+        
+        self.assertTrue(self.generator.generate_batch({'structure': ['app.py']}, True, 60))
+        
+        _STUB_CLIENT.chat.completions.create.assert_not_called()
+        self.assertEqual(self.generator.llm_calls_made, 5)
+        self.assertEqual((self.repo_path / "README.md").read_text(), "# README.md")
+        self.assertEqual((self.repo_path / "docs" / "api.md").read_text(), "# api")
+    
+    def test_generate_batch_partial_results(self):
+        """Test that returned batch results are kept and only failed ones are retried."""
+        _STUB_CLIENT.batches.create.return_value = MagicMock(
+            id='batch_1', status='completed', output_file_id='file_out'
+        )
+        records = [
+            {
+                'custom_id': custom_id,
+                'response': {
+                    'status_code': 200,
+                    'body': {'choices': [{'message': {'content': f"# {custom_id}"}}]},
+                },
+            }
+            for custom_id in ['README.md', 'architecture', 'api', 'setup']
+        ]
+        records.append({'custom_id': 'usage', 'response': {'status_code': 500, 'body': {}}})
+        _STUB_CLIENT.files.content.return_value.text = "\n".join(map(json.dumps, records))
+        self.response_content = "# Direct usage"
+        
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            generator = DocumentationGenerator(self.repo_path, "medium", 5)
+        self.assertTrue(generator.generate_batch({'structure': ['app.py']}, True, 60))
+        
+        self.assertEqual(_STUB_CLIENT.chat.completions.create.call_count, 1)
+        self.assertEqual(generator.llm_calls_made, 5)
         docs_path = self.repo_path / "docs"
-        self.assertTrue(docs_path.exists())
-        self.assertTrue(docs_path.is_dir())
+        self.assertEqual((self.repo_path / "README.md").read_text(), "# README.md")
+        self.assertEqual((docs_path / "setup.md").read_text(), "# setup")
+        self.assertEqual((docs_path / "usage.md").read_text(), "# Direct usage")
+    
+    def test_generate_batch_malformed_results(self):
+        """Test that malformed successful batch records are retried directly."""
+        _STUB_CLIENT.batches.create.return_value = MagicMock(
+            id='batch_1', status='completed', output_file_id='file_out'
+        )
+        _STUB_CLIENT.files.content.return_value.text = "\n".join([
+            json.dumps({'custom_id': 'architecture', 'response': {'status_code': 200, 'body': {'choices': []}}}),
+            json.dumps({'custom_id': 'api', 'response': {'status_code': 200}}),
+            "{not json",
+        ])
+        self.response_content = "# Direct"
+        
+        self.assertTrue(self.generator.generate_batch({'structure': ['app.py']}, False, 60))
+        
+        self.assertEqual(_STUB_CLIENT.chat.completions.create.call_count, 4)
+        self.assertEqual((self.repo_path / "docs" / "api.md").read_text(), "# Direct")
+    
+    def test_generate_batch_timeout(self):
+        """Test that an unfinished batch job is cancelled and reported as failed."""
+        _STUB_CLIENT.batches.create.return_value = MagicMock(id='batch_1', status='in_progress')
+        
+        self.assertFalse(self.generator.generate_batch({'structure': ['app.py']}, False, 0))
+        
+        _STUB_CLIENT.batches.cancel.assert_called_once_with('batch_1')
+        self.assertEqual(self.generator.llm_calls_made, 0)
+        self.assertFalse((self.repo_path / "docs").exists())
+    
+    def test_structure_is_truncated_in_prompts(self):
+        """Test that long file listings are truncated before reaching the LLM."""
+        structure = [f"file_{i}.py" for i in range(600)]
+        context = self.generator._prepare_readme_context({'structure': structure})
+        
+        self.assertIn("file_499.py", context)
+        self.assertNotIn("file_500.py", context)
+        self.assertIn("... and 100 more files", context)
     
     def test_different_detail_levels(self):
         """Test that different detail levels affect documentation generation."""
@@ -236,14 +369,10 @@ class TestMainCLI(unittest.TestCase):
     
     def setUp(self):
         """Set up test environment."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.repo_path = Path(self.temp_dir) / "test_repo"
-        self.repo_path.mkdir()
+        self.temp_dir = make_test_dir(self.id())
+        self.repo_path = self.temp_dir / "test_repo"
+        self.repo_path.mkdir(exist_ok=True)
         
-    def tearDown(self):
-        """Clean up test environment."""
-        shutil.rmtree(self.temp_dir)
-    
     @patch('documentation_bot.DocumentationBot')
     def test_main_with_valid_arguments(self, mock_bot):
         """Test main function with valid command line arguments."""
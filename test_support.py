@@ -0,0 +1,90 @@
+"""
+Shared fixtures for the documentation bot test suite.
+"""
+
+import os
+import atexit
+import tempfile
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import Dict, Iterator
+
+
+# One temporary directory for the whole test run, on tmpfs when available.
+# Each test works in its own subdirectory and everything is removed once, at
+# interpreter exit.
+_TMP_ROOT = "/dev/shm" if os.access("/dev/shm", os.W_OK) else None
+# The pid in the name tells the directories of parallel pytest-xdist workers apart.
+SHARED_TMP = Path(tempfile.mkdtemp(prefix=f"docbot_tests_{os.getpid()}_", dir=_TMP_ROOT))
+
+
+def _fast_rmtree(path: str) -> None:
+    """Remove the tree at path, ignoring errors like ``shutil.rmtree``.
+    
+    Each directory is opened once; its entries are listed from that
+    descriptor and unlinked relative to it, so no path is resolved twice.
+    """
+    try:
+        dir_fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        with os.scandir(dir_fd) as it:
+            for entry in it:
+                with suppress(OSError):
+                    if entry.is_dir(follow_symlinks=False):
+                        _fast_rmtree(os.path.join(path, entry.name))
+                    else:
+                        os.unlink(entry.name, dir_fd=dir_fd)
+    finally:
+        os.close(dir_fd)
+    with suppress(OSError):
+        os.rmdir(path)
+
+
+atexit.register(_fast_rmtree, str(SHARED_TMP))
+
+# Analysis cache for the tests' analyzers, kept out of ~/.cache
+CACHE_DIR = SHARED_TMP / "cache"
+
+
+def make_test_dir(test_id: str) -> Path:
+    """Create and return the directory for test_id inside SHARED_TMP.
+    
+    The name is derived from the test id (``TestCase.id()``), so a failing
+    test's directory is easy to find and no random names have to be probed.
+    """
+    test_dir = SHARED_TMP / test_id.replace(".", "_")
+    test_dir.mkdir(exist_ok=True)
+    return test_dir
+
+
+@contextmanager
+def in_dir(root: Path) -> Iterator[int]:
+    """Open root once as a directory and yield its file descriptor."""
+    dir_fd = os.open(root, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        yield dir_fd
+    finally:
+        os.close(dir_fd)
+
+
+def make_files(root: Path, files: Dict[str, bytes]) -> None:
+    """Create each ``{relative_name: data}`` file under root in one pass.
+    
+    Files are opened relative to a single descriptor for root, so the path to
+    root is resolved once rather than per file, and written with raw os.write.
+    Missing parent directories of nested names are created.
+    """
+    with in_dir(root) as dir_fd:
+        for name, data in files.items():
+            parents = name.split("/")[:-1]
+            for depth in range(1, len(parents) + 1):
+                parent = "/".join(parents[:depth])
+                with suppress(FileExistsError):
+                    os.mkdir(parent, dir_fd=dir_fd)
+            fd = os.open(name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644, dir_fd=dir_fd)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)